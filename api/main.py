@@ -2,13 +2,15 @@
 
 import json
 import asyncio
+import logging
 import sys
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
 
 from helpers import IO_TIMEOUT
-from lib.videos import fetch_multiple_videos
+from lib.videos import fetch_multiple_videos, close_session
 from lib.scraper import scrape_multiple_videos
 from pydantic import BaseModel
 from typing import List, Dict, Optional
@@ -16,7 +18,14 @@ from datetime import datetime
 
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # API session is shared by all fetch jobs, closed along with the server
+    await close_session()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 # Enable CORS
@@ -86,8 +95,8 @@ async def start_tool(request: ScrapeRequest, background_tasks: BackgroundTasks,
     if tool_name not in yt_data_tools:
         return {"error": f"Invalid request, no such tool: {tool_name}"}
     
-    print(f"Starting scraping job with tool: {tool_name}")  
-    print(f"Video IDs: {request.video_ids}")
+    logging.info("Starting scraping job with tool: %s", tool_name)
+    logging.debug("Video IDs: %s", request.video_ids)
 
     job_id = datetime.now().strftime("%Y%m%d_%H%M%S")
     scraping_jobs[job_id] = {
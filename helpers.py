@@ -1,6 +1,9 @@
+import asyncio
+import functools
 import logging
 import os
 import pathlib
+import re
 
 from bidict import bidict
 from dotenv import load_dotenv
@@ -27,10 +30,20 @@ IO_RATE_LIMIT = int(os.getenv("IO_RATE_LIMIT", 1))
 # also 50 max video ids currently allowed to be requested at once by the YT API.
 IO_BATCH_SIZE = int(os.getenv("IO_BATCH_SIZE", 50))
 
+# local state reused across runs, eg. browser cookies
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+
+# seconds scraped videos are served from the disk cache, 0 disables it
+SCRAPE_CACHE_TTL = int(os.getenv("SCRAPE_CACHE_TTL", 6 * 60 * 60))
+
+# seconds videos fetched from the YouTube Data API are served from the disk cache, 0 disables it
+API_CACHE_TTL = int(os.getenv("API_CACHE_TTL", 24 * 60 * 60))
+
 
 __all__ = (
   'IO_TIMEOUT', 'IO_CONCURRENCY_LIMIT', 'IO_RATE_LIMIT', 'IO_BATCH_SIZE',
-  'file_exists', 'remove_file'
+  'CACHE_DIR', 'SCRAPE_CACHE_TTL', 'API_CACHE_TTL', 'file_exists', 'remove_file', 'iso_to_seconds',
+  'install_uvloop'
 )
 
 
@@ -39,9 +52,35 @@ file_exists = lambda path: (os.path.isfile(path) and os.path.getsize(path) > 0)
 remove_file = lambda path, missing_ok=True: pathlib.Path(path).unlink(missing_ok)
 
 
+def install_uvloop():
+  """ Run asyncio on libuv's event loop, if installed (not available on Windows).
+  To be called by entry points before asyncio.run(), library code leaves the loop alone.
+  """
+
+  try:
+    import uvloop
+  except ImportError:
+    return
+  asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+
+
+# ISO 8601 durations as found on YouTube, eg. "PT2H30M", "P1DT2H", "P0D"
+_ISO_DURATION_RE = re.compile(r'P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?')
+
+
+def iso_to_seconds(duration: str):
+  """ ISO 8601 duration -> seconds, None if not a duration """
+
+  match = _ISO_DURATION_RE.fullmatch(duration)
+  if not match:
+    return None
+  days, hours, minutes, seconds = (int(n or 0) for n in match.groups())
+  return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+
 def bidirectional_lookup(mapping: dict, key_or_value: str, raise_exc=True):
 
-  bimap = bidict(mapping)
+  bimap = mapping if isinstance(mapping, bidict) else bidict(mapping)
   if key_or_value in bimap:
     return bimap[key_or_value]
   elif key_or_value in bimap.inv:
@@ -52,12 +91,17 @@ def bidirectional_lookup(mapping: dict, key_or_value: str, raise_exc=True):
     raise KeyError(f"{key_or_value} not found in either direction")
   
 
-# Attempt to map language name to code (very basic)
-map_language = lambda lang: bidirectional_lookup({
+# Language names <-> codes, built once (very basic)
+LANGUAGES = bidict({
   "English": "en",
   "Spanish": "es",
   "French": "fr",
   "German": "de",
   "Chinese": "zh",
   "Japanese": "ja"
-}, lang)
\ No newline at end of file
+})
+
+# Attempt to map language name to code (very basic),
+# memoized as the same few languages repeat across channels
+map_language = functools.lru_cache(maxsize=2048)(
+  lambda lang: bidirectional_lookup(LANGUAGES, lang))
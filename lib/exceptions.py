@@ -2,7 +2,7 @@ import traceback
 
 
 __all__ = (
-    'AsyncException', 'VideoError',
+    'AsyncException', 'VideoError', 'RateLimitError',
 )
 
 
@@ -31,3 +31,7 @@ class VideoError(AsyncException):
     def __init__(self, video_id, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.video_id = video_id
+
+
+class RateLimitError(AsyncException):
+    """ Server answered 429 Too Many Requests """
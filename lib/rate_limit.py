@@ -0,0 +1,82 @@
+import asyncio
+import time
+
+
+__all__ = (
+    'AdaptiveRateLimiter', 'retry_after',
+)
+
+
+def retry_after(response, default=None):
+    """ Seconds to wait as per a response's Retry-After header, if given in seconds """
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, TypeError, ValueError):
+        return default
+
+
+class AdaptiveRateLimiter:
+    """  Spaces requests out to at most `rate` per second, as the server allows
+
+        Requests are started 1/rate seconds apart. On a 429, the rate is halved
+        (down to `min_rate`) and every request pauses for Retry-After seconds,
+        else for an exponential backoff. After each `recover_after` seconds without
+        a 429, the rate ramps back up by `recover_factor`, up to `rate`.
+
+        ** Example usage **
+
+        limiter = AdaptiveRateLimiter(5)
+        async with limiter:
+          async with session.get(url) as response:
+            if response.status == 429:
+              limiter.throttle(retry_after(response))
+    """
+
+    def __init__(self, rate, min_rate=1, backoff_factor=0.5,
+                 recover_after=60, recover_factor=1.1, max_backoff=60):
+        self.rate = float(rate)
+        self.min_rate = min(float(min_rate), self.rate)
+        self.current_rate = self.rate
+        self.backoff_factor = backoff_factor
+        self.recover_after = recover_after
+        self.recover_factor = recover_factor
+        self.max_backoff = max_backoff
+
+        self._next_start = 0.0
+        self._paused_until = 0.0
+        self._changed_at = time.monotonic()
+        self._backoffs = 0
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return None
+
+    async def acquire(self):
+        """ Wait for the next request slot """
+        now = time.monotonic()
+        if self.current_rate < self.rate and now - self._changed_at >= self.recover_after:
+            self.current_rate = min(self.rate, self.current_rate * self.recover_factor)
+            self._changed_at = now
+            self._backoffs = 0
+
+        # slots are handed out in call order, no lock needed on a single event loop
+        start = max(now, self._next_start, self._paused_until)
+        self._next_start = start + 1 / self.current_rate
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def throttle(self, delay=None):
+        """ Slow down and pause all requests, after the server answered 429 """
+        now = time.monotonic()
+        if now < self._paused_until:
+            return  # concurrent 429s of the same burst only count once
+
+        self._backoffs += 1
+        self.current_rate = max(self.min_rate, self.current_rate * self.backoff_factor)
+        if delay is None:
+            delay = min(2 ** self._backoffs, self.max_backoff)
+        self._paused_until = self._next_start = now + delay
+        self._changed_at = now
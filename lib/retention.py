@@ -1,16 +1,26 @@
+import asyncio
+import functools
+
+import aiohttp
+import aiometer
+import orjson
 import pandas as pd
-from googleapiclient.discovery import build
 from oauth2client.file import Storage
 from oauth2client.client import flow_from_clientsecrets
 from oauth2client.tools import run_flow, argparser
 
+from helpers import IO_CONCURRENCY_LIMIT, IO_RATE_LIMIT
+
 # Setup the YouTube API
 CLIENT_SECRETS_FILE = "client_secret.json"  # Path to OAuth 2.0 client secrets.
 SCOPES = ['https://www.googleapis.com/auth/yt-analytics.readonly']
 API_SERVICE_NAME = 'youtubeAnalytics'
 API_VERSION = 'v2'
 
-def get_authenticated_service():
+# Analytics reports.query, called directly rather than through googleapiclient's blocking client
+REPORTS_URL = 'https://youtubeanalytics.googleapis.com/v2/reports'
+
+def get_credentials():
     flow = flow_from_clientsecrets(CLIENT_SECRETS_FILE, scope=SCOPES)
     storage = Storage("%s-oauth2.json" % API_SERVICE_NAME)
     credentials = storage.get()
@@ -19,19 +29,30 @@ def get_authenticated_service():
         flow.redirect_uri = 'http://localhost:8080/'
         flags = argparser.parse_args(args=[])
         credentials = run_flow(flow, storage, flags)
-    return build(API_SERVICE_NAME, API_VERSION, credentials=credentials)
+    return credentials
 
-def get_audience_retention(youtube_analytics, video_id, year):
+def get_session():
+    # One session for all reports, authorized per request (see get_audience_retention)
+    connector = aiohttp.TCPConnector(limit=IO_CONCURRENCY_LIMIT, keepalive_timeout=75)
+    return aiohttp.ClientSession(connector=connector)
+
+async def get_audience_retention(session, credentials, video_id, year):
     # Call the YouTube Analytics API to fetch audience retention
-    response = youtube_analytics.reports().query(
-        ids='channel==UCCtcQHR6-mQHQh6G06IPlDA',
-        startDate=f'{year}-01-01',
-        endDate=f'{year+1}-01-01',
-        metrics='audienceWatchRatio',
-        dimensions='elapsedVideoTimeRatio',
-        filters=f'video=={video_id}',
-        sort='elapsedVideoTimeRatio'
-    ).execute()
+    params = {
+        'ids': 'channel==UCCtcQHR6-mQHQh6G06IPlDA',
+        'startDate': f'{year}-01-01',
+        'endDate': f'{year+1}-01-01',
+        'metrics': 'audienceWatchRatio',
+        'dimensions': 'elapsedVideoTimeRatio',
+        'filters': f'video=={video_id}',
+        'sort': 'elapsedVideoTimeRatio',
+    }
+    # Access tokens expire after an hour, long runs outlive them:
+    # get_access_token() returns the current token, refreshed once expired
+    token = credentials.get_access_token().access_token
+    async with session.get(REPORTS_URL, params=params, headers={'Authorization': f'Bearer {token}'}) as r:
+        r.raise_for_status()
+        response = await r.json(loads=orjson.loads)
 
     if 'rows' in response:
         return pd.DataFrame(response['rows'], columns=['ElapsedVideoTimeRatio', 'AudienceWatchRatio'])
@@ -43,31 +64,38 @@ def find_closest_ratio(retention_data, target_ratio):
     closest_idx = (retention_data['ElapsedVideoTimeRatio'] - target_ratio).abs().idxmin()
     return retention_data.iloc[closest_idx]['AudienceWatchRatio']
 
-def process_videos(file_path):
-    youtube_analytics = get_authenticated_service()
+async def process_video(session, credentials, row, year):
+    video_id = row['Video ID']
+    target_ratio = float(row['ElapsedVideoTimeRatio'].strip('%')) / 100  # Convert percentage to decimal
+
+    retention_data = await get_audience_retention(session, credentials, video_id, year)
+    if not retention_data.empty:
+        closest_watch_ratio = find_closest_ratio(retention_data, target_ratio)
+    else:
+        closest_watch_ratio = None  # Set to None if no data is found
+
+    # Retain original data and update the audienceWatchRatio
+    return [
+        video_id, 
+        row['ElapsedVideoTimeRatio'], 
+        closest_watch_ratio, 
+        row['Total Views'], 
+        row['Retained Views'],
+        year  # Include the year
+    ]
+
+async def process_videos(file_path):
+    credentials = get_credentials()
     data = pd.read_csv(file_path)
-    results = []
-
-    for year in range(2010, 2025):
-        for index, row in data.iterrows():
-            video_id = row['Video ID']
-            target_ratio = float(row['ElapsedVideoTimeRatio'].strip('%')) / 100  # Convert percentage to decimal
-
-            retention_data = get_audience_retention(youtube_analytics, video_id, year)
-            if not retention_data.empty:
-                closest_watch_ratio = find_closest_ratio(retention_data, target_ratio)
-            else:
-                closest_watch_ratio = None  # Set to None if no data is found
-
-            # Retain original data and update the audienceWatchRatio
-            results.append([
-                video_id, 
-                row['ElapsedVideoTimeRatio'], 
-                closest_watch_ratio, 
-                row['Total Views'], 
-                row['Retained Views'],
-                year  # Include the year
-            ])
+
+    # One report per video and year, queried concurrently (with rate control),
+    # results kept in the same year then row order as queried
+    async with get_session() as session:
+        tasks = [functools.partial(process_video, session, credentials, row, year)
+                 for year in range(2010, 2025)
+                 for index, row in data.iterrows()]
+        results = await aiometer.run_all(
+            tasks, max_per_second=IO_RATE_LIMIT, max_at_once=IO_CONCURRENCY_LIMIT)
 
     # Save results with updated audienceWatchRatio
     column_names = ['Video ID', 'ElapsedVideoTimeRatio', 'AudienceWatchRatio', 'Total Views', 'Retained Views', 'Year']
@@ -78,4 +106,4 @@ def process_videos(file_path):
 if __name__ == "__main__":
     # Example usage
     file_path = 'sheets_yt_jfm_retention - Sheet6.csv'
-    process_videos(file_path)
+    asyncio.run(process_videos(file_path))
@@ -6,262 +6,750 @@ playwright install  # To download browser binaries
 """
 
 import functools
+import itertools
 import os
+import pathlib
 import re
+import socket
 import asyncio
 import json
 import logging
 
 import urllib.parse
 from collections import defaultdict
+from datetime import datetime
 from typing import Dict
 
+import aiohttp
 import aiometer
-from dateutil import parser
+import diskcache
+import orjson
+from aiohttp.resolver import AsyncResolver
 from urllib.parse import urlparse, urljoin
 from playwright.async_api import async_playwright
 from tqdm import tqdm
 
 from models import DataPipeline, Video, asdict
-from lib.exceptions import AsyncException, VideoError
+from lib.exceptions import AsyncException, VideoError, RateLimitError
+from lib.rate_limit import AdaptiveRateLimiter, retry_after
 from helpers import IO_RATE_LIMIT, IO_TIMEOUT, IO_CONCURRENCY_LIMIT, LOG_LEVEL, \
-    map_language
+    CACHE_DIR, SCRAPE_CACHE_TTL, file_exists, install_uvloop, map_language
 
 
 logging.basicConfig(level=LOG_LEVEL)
 
 
+# abbreviated counts, eg. "1.2M", "1,234"
+_MULTIPLIERS = {'K': 1_000, 'M': 1_000_000, 'B': 1_000_000_000}
+_MULTIPLIERS.update({suffix.lower(): value for suffix, value in _MULTIPLIERS.items()})
+_COUNT_TRANS = str.maketrans('', '', ', \u00a0')
+
+# first count in a like button label or comments header, eg. "1.2K", "345"
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?[KMB]?\b')
+
+# channel handle from its url, eg. "https://www.youtube.com/@Godlife"
+_CHANNEL_ID_RE = re.compile(r'/@([^/]+)')
+
+# channel about page: country and language as found in the metadata text
+_COUNTRY_RE = re.compile(r'Country\s*:\s*([^\n]+)')
+_LANGUAGE_RE = re.compile(r'Language\s*:\s*([^\n]+)')
+
+# channel about page html: start of the embedded ytInitialData json literal
+_INITIAL_DATA_RE = re.compile(r'ytInitialData\s*=\s*\{')
+
+_CHANNEL_ABOUT_SELECTOR = 'yt-formatted-string:has-text("Country"), yt-formatted-string:has-text("Language")'
+
+# like button, whichever of the known layouts the watch page uses
+_LIKES_SELECTORS = (
+    'ytd-menu-renderer button[aria-label*="like"]',
+    'like-button-view-model button',
+    'segmented-like-button-view-model button',
+    '#top-level-buttons-computed button:first-child',
+)
+_LIKES_SELECTOR = ', '.join(_LIKES_SELECTORS)
+
+# reads the player response the watch page was served with, the likes from the
+# aria-label, else inner text, of the like button and the comments header text,
+# in a single round-trip to the browser
+_PAGE_FIELDS_JS = """([likesSelector, commentsSelector]) => {
+    const like = document.querySelector(likesSelector);
+    return {
+        player: window.ytInitialPlayerResponse,
+        likes: like && (like.getAttribute('aria-label') || like.innerText),
+        comments: document.querySelector(commentsSelector)?.innerText,
+    };
+}"""
+
+# the player response is set by the watch page's first inline scripts,
+# for unavailable videos too (then without videoDetails)
+_PLAYER_READY_JS = "() => !!window.ytInitialPlayerResponse"
+
+# comments header count, only rendered once scrolled into view
+_COMMENTS_SELECTORS = (
+    '#comments #count .count-text',
+    'h2.ytd-comments-header-renderer',
+    'yt-formatted-string.ytd-comments-header-renderer',
+)
+_COMMENTS_SELECTOR = ', '.join(_COMMENTS_SELECTORS)
+
+# reads the about page metadata text in a single round-trip to the browser
+_CHANNEL_ABOUT_JS = """() => [...document.querySelectorAll('yt-formatted-string')]
+    .map(e => e.innerText)
+    .filter(text => /Country|Language/.test(text))
+    .join('\\n')"""
+
+# browserless fetches: metadata embedded as json in the watch page html
+_HTTP_HEADERS = {
+    "Accept-Language": "en-US,en;q=0.9",
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36",
+}
+_CONSENT_COOKIES = {"SOCS": "CAI"}  # consent already answered, skips the consent wall
+_PLAYER_RESPONSE_RE = re.compile(r'ytInitialPlayerResponse\s*=\s*\{')
+_LIKE_COUNT_RE = re.compile(r'"likeCountIfIndifferentNumber"\s*:\s*"(\d+)"')
+
+# InnerTube, the json api behind the watch page: /player for video details,
+# /next for the like count and comments panel
+_INNERTUBE_URL = "https://www.youtube.com/youtubei/v1"
+_INNERTUBE_CONTEXT = {
+    "context": {"client": {"clientName": "WEB", "clientVersion": "2.20241126.01.00",
+                           "hl": "en", "gl": "US"}},
+}
+
+# times a video fetch is retried after YouTube answered 429, before rendering it instead
+_RATE_LIMIT_RETRIES = 3
+
+# playability statuses of removed or otherwise unavailable videos. Not LOGIN_REQUIRED:
+# also answered by the InnerTube api to flagged clients ("Sign in to confirm you're not a bot")
+_UNAVAILABLE_STATUSES = frozenset({"ERROR", "UNPLAYABLE"})
+
+# channel details read from the channel about page
+_CHANNEL_ABOUT_KEYS = ("country", "language_name", "language_code")
+
+# seconds videos scraped without any channel details are served from the disk cache
+_INCOMPLETE_CACHE_TTL = 60 * 60
+
+_CHANNEL_DEFAULTS = {
+    "channel_id": "Unknown",
+    "subscribers_gained": 0,
+    "subscribers_lost": 0,
+    "country": "Unknown",
+    "language_name": "Unknown",
+    "language_code": "Unknown"
+}
+
+# headless text scraping needs no gpu, audio, extensions or background services
+_CHROMIUM_ARGS = [
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-background-timer-throttling",
+    "--disable-renderer-backgrounding",
+    "--disable-features=TranslateUI,IsolateOrigins,site-per-process",
+    "--mute-audio",
+    "--blink-settings=imagesEnabled=false",
+]
+
+# browser contexts: en-US dates and counts, desktop watch page layout,
+# same user agent as the HTTP session so that both get served the same pages
+_CONTEXT_OPTIONS = {"locale": "en-US", "viewport": {"width": 1280, "height": 800},
+                    "user_agent": _HTTP_HEADERS["User-Agent"]}
+
+# resource types no scraped field depends on, aborted to save bandwidth
+_BLOCKED_RESOURCE_TYPES = frozenset({"image", "stylesheet", "font", "media"})
+
+# ad, analytics and video streaming hosts, whatever the resource type
+_BLOCKED_HOSTS = ("doubleclick.net", "googlesyndication.com", "google-analytics.com",
+                  "googletagmanager.com", "googlevideo.com")
+
+# YouTube's own ad and playback telemetry endpoints
+_BLOCKED_PATHS = ("/api/stats/", "/pagead/", "/ptracking", "/youtubei/v1/log_event")
+
+
+async def _block_resources(route):
+    """ Playwright route handler, aborts requests for unneeded resources """
+    url = urlparse(route.request.url)
+    if route.request.resource_type in _BLOCKED_RESOURCE_TYPES \
+            or (url.hostname or '').endswith(_BLOCKED_HOSTS) or url.path.startswith(_BLOCKED_PATHS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+@functools.lru_cache(maxsize=4096)
+def _make_absolute_url(url):
+    """ Make url FQDN if relative. Cached, channel urls repeat across videos """
+    return url if urlparse(url).netloc else urljoin('https://www.youtube.com', url)
+
+
+def _new_video_stats(video_id):
+    """ Video statistics, defaulting to unknown values """
+    return {
+        "video_id": video_id,
+        "title": "Unknown",
+        "duration": 0,
+        "view_count": 0,
+        "likes": 0,
+        "comments": 0,
+        "shares": 0,
+        "dislikes": 0,
+        "published_at": "Unknown",
+        "upload_date": "Unknown",
+        "channel_name": "Unknown",
+        "url": f"https://www.youtube.com/watch?v={video_id}",
+        "thumbnail_url": "Unknown",
+    }
+
+
+def _extract_json_literal(html, pattern):
+    """ Decode the json object literal that `pattern` matches the start of in html, if any """
+    match = pattern.search(html)
+    if not match:
+        return None
+    try:
+        value, _ = json.JSONDecoder().raw_decode(html, match.end() - 1)
+        return value
+    except ValueError:
+        return None
+
+
+def _extract_player_response(html):
+    """ Decode the ytInitialPlayerResponse json literal from watch page html, if any """
+    return _extract_json_literal(html, _PLAYER_RESPONSE_RE)
+
+
+def _find_json_key(value, key):
+    """ Value of the first `key` found in nested json, depth first, None if not found """
+    if isinstance(value, dict):
+        if key in value:
+            return value[key]
+        value = value.values()
+    elif not isinstance(value, list):
+        return None
+    for child in value:
+        found = _find_json_key(child, key)
+        if found is not None:
+            return found
+    return None
+
+
+def _parse_about_channel(initial_data):
+    """ Country and language from the aboutChannelViewModel of an about page's ytInitialData """
+    view_model = _find_json_key(initial_data, "aboutChannelViewModel") or {}
+    about = {}
+    if isinstance(view_model.get("country"), str):
+        about["country"] = view_model["country"]
+    if isinstance(view_model.get("language"), str):
+        about["language_name"] = view_model["language"]
+        about["language_code"] = map_language(view_model["language"])
+    return about
+
+
+def _raise_if_unavailable(video_id, player):
+    """ Raise VideoError if a player response says the video can't be played at all """
+    status = (player or {}).get("playabilityStatus", {})
+    if status.get("status") in _UNAVAILABLE_STATUSES:
+        raise VideoError(video_id, f'Error scraping video "{video_id}": {status.get("reason")}')
+
+
+def _parse_player_response(player):
+    """ Video and channel statistics from a player response with videoDetails """
+    details = player["videoDetails"]
+    microformat = player.get("microformat", {}).get("playerMicroformatRenderer", {})
+    thumbnails = details.get("thumbnail", {}).get("thumbnails") or [{}]
+
+    # prefer the channel handle, as found in channel urls, over the raw channel id
+    channel_id_match = _CHANNEL_ID_RE.search(microformat.get("ownerProfileUrl", ""))
+    channel_id = urllib.parse.unquote(channel_id_match.group(1)) \
+        if channel_id_match else details.get("channelId", "Unknown")
+
+    stats = {
+        **_CHANNEL_DEFAULTS,
+        "title": details.get("title", "Unknown Title"),
+        "duration": int(details.get("lengthSeconds", 0)),
+        "view_count": int(details.get("viewCount", 0)),
+        "channel_name": details.get("author", "Unknown Channel"),
+        "channel_id": channel_id,
+        "thumbnail_url": thumbnails[-1].get("url", "Unknown"),
+    }
+    for key, value in (("published_at", microformat.get("publishDate")),
+                       ("upload_date", microformat.get("uploadDate"))):
+        if value:
+            stats[key] = datetime.fromisoformat(value)
+
+    return stats
+
+
+def _parse_comments_count(watch_next):
+    """ Comments count text, eg. "1.2K", from the comments panel of a /next response """
+    for panel in watch_next.get("engagementPanels", []):
+        renderer = panel.get("engagementPanelSectionListRenderer", {})
+        if renderer.get("panelIdentifier") == "engagement-panel-comments-section":
+            header = renderer.get("header", {}).get("engagementPanelTitleHeaderRenderer", {})
+            runs = header.get("contextualInfo", {}).get("runs") or [{}]
+            return runs[0].get("text")
+    return None
+
+
+# Playwright driver and browser shared by all scrapers in the process,
+# started by the first scraper entered and stopped when the last one exits
+_playwright = None
+_browser = None
+_browser_refs = 0
+_browser_lock = asyncio.Lock()
+
+
+async def _acquire_browser():
+    """ Launch, else reuse, the shared headless browser """
+    global _playwright, _browser, _browser_refs
+
+    async with _browser_lock:
+        if _browser is None:
+            _playwright = await async_playwright().start()
+            _browser = await _playwright.chromium.launch(headless=True, args=_CHROMIUM_ARGS)
+        _browser_refs += 1
+        return _browser
+
+
+async def _release_browser():
+    """ Close the shared browser and driver once no scraper uses them """
+    global _playwright, _browser, _browser_refs
+
+    async with _browser_lock:
+        _browser_refs -= 1
+        if _browser_refs == 0:
+            await _browser.close()
+            await _playwright.stop()
+            _playwright = _browser = None
+
+
 class YouTubeVideoScraper:
 
-    def __init__(self, concurrency=None, max_per_second=None):
+    def __init__(self, concurrency=None, max_per_second=None, isolate_contexts=False):
         self.browser = None
+        self.context = None
         self.page = None
+        self._session = None
         self.concurrency = int(concurrency or IO_CONCURRENCY_LIMIT)
+
+        # hard cap on pages rendering at once, however many tasks are scraping
+        self._page_slots = asyncio.Semaphore(self.concurrency)
+
+        # pages of the shared context, opened on demand (up to `concurrency`)
+        # then reused from one rendered video to the next
+        self._pages = asyncio.Queue()
+        self._pages_opened = 0
+
+        # one throwaway context per rendered video instead of the shared one,
+        # created one at a time when many tasks start at once
+        self.isolate_contexts = isolate_contexts
+        self._context_lock = asyncio.Lock()
+        self._storage_state = None
+
+        # videos scraped by this scraper, by id,
+        # and by previous runs, by id, for SCRAPE_CACHE_TTL seconds
+        self._video_cache: Dict[str, Video] = {}
+        self._disk_cache = None
+
+        # channel about page details, scraped once per channel url
+        self._channel_cache: Dict[str, dict] = {}
+        self._channel_locks: Dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._state_path = pathlib.Path(CACHE_DIR, 'playwright_state.json')
         self.max_per_second = int(max_per_second or IO_RATE_LIMIT)
+
+        # paces requests to YouTube, slowing down whenever it answers 429
+        self._limiter = AdaptiveRateLimiter(self.max_per_second)
     
     
     async def __aenter__(self):
-        self.playwright = await async_playwright().start()
-        self.browser = await self.playwright.chromium.launch(
-            headless=True)  # Run browser in background
+        self.browser = await _acquire_browser()  # Run browser in background
+        try:
+            # One context shared by all pages: disk cache, connections and
+            # service workers are reused from one video to the next.
+            self.context = await self._new_context()
+            self._storage_state = await self.context.storage_state()
+
+            if SCRAPE_CACHE_TTL > 0:
+                self._disk_cache = diskcache.Cache(pathlib.Path(CACHE_DIR, 'videos'))
+
+            # Shared HTTP session for browserless fetches. Resolves DNS with aiodns
+            # so that concurrent requests don't queue on the getaddrinfo thread pool.
+            # Watch, player and about page requests all go to www.youtube.com: keep
+            # their TLS connections alive across rate-limited gaps between videos.
+            connector = aiohttp.TCPConnector(
+                resolver=AsyncResolver(), family=socket.AF_INET, ttl_dns_cache=300,
+                limit=self.concurrency, limit_per_host=self.concurrency, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector, headers=_HTTP_HEADERS, cookies=_CONSENT_COOKIES,
+                timeout=aiohttp.ClientTimeout(total=IO_TIMEOUT / 1000))
+        except BaseException:
+            # eg. corrupt playwright_state.json: don't keep the shared browser running
+            if self._disk_cache is not None:
+                self._disk_cache.close()
+            if self.context is not None:
+                await self.context.close()
+            await _release_browser()
+            raise
+
         return self
 
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        await self.browser.close()
-        await self.playwright.stop()
+    async def _new_context(self):
+        """
+        Browser context blocking heavy resources. Cookies of the shared context,
+        else saved by the previous run, skip the consent and cookie walls.
+        On a cold start, consent is answered once and kept from then on.
+        """
+        state = self._storage_state or (
+            self._state_path if file_exists(self._state_path) else None)
+
+        context = await self.browser.new_context(**_CONTEXT_OPTIONS, storage_state=state)
+        await context.route("**/*", _block_resources)
+        if state is None:
+            await context.add_cookies([
+                {"name": name, "value": value, "domain": ".youtube.com", "path": "/"}
+                for name, value in _CONSENT_COOKIES.items()])
+            await self._accept_consent(context)
+        return context
+
+    @staticmethod
+    async def _accept_consent(context):
+        """ Click through the consent dialog, if YouTube still shows one """
+        page = await context.new_page()
+        try:
+            await page.goto('https://www.youtube.com', wait_until='domcontentloaded')
+            await page.get_by_role('button', name='Accept all').first.click(timeout=3000)
+        except Exception:
+            logging.debug('No consent dialog to accept')
+        finally:
+            await page.close()
 
-    def _parse_count(self, count_str):
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self._session.close()
+        if self._disk_cache is not None:
+            self._disk_cache.close()
+        if exc_type is None:
+            self._state_path.parent.mkdir(parents=True, exist_ok=True)
+            await self.context.storage_state(path=self._state_path)
+        await self.context.close()
+        await _release_browser()
+
+    def _check_rate_limit(self, response):
+        """ Throttle all requests and raise if YouTube answered 429 Too Many Requests """
+        if response.status == 429:
+            self._limiter.throttle(retry_after(response))
+            raise RateLimitError(f"Rate limited by {urlparse(str(response.url)).hostname}")
+
+    async def _goto(self, page, url):
+        """ Navigate a page once the limiter allows, proceed as soon as the DOM is loaded """
+        await self._limiter.acquire()
+        response = await page.goto(url, wait_until='domcontentloaded')
+        if response is not None:
+            self._check_rate_limit(response)
+
+    @staticmethod
+    def _parse_count(count_str):
         """
-        Parse view, like, or other numeric count from string.
+        Parse view, like, or other numeric count from string, eg. "1.2K", "1,234".
         Converts K, M, etc. to actual numbers.
         """
-        count_str = "".join(count_str)
-        if not count_str or not isinstance(count_str, str):
+        count_str = count_str.translate(_COUNT_TRANS)
+        if not count_str:
             return 0
 
-        # Remove non-numeric characters except dots and K, M, B
-        count_str = count_str.replace(',', '').replace(' ', '')
+        multiplier = _MULTIPLIERS.get(count_str[-1], 1)
+        number = count_str[:-1] if multiplier != 1 else count_str
+        try:
+            return int(float(number) * multiplier)
+        except ValueError:
+            return 0
 
-        multipliers = {
-            'K': 1000,
-            'M': 1000000,
-            'B': 1000000000
-        }
+    async def _fetch_channel_about(self, channel_url):
+        """
+        Read the channel country and language from the ytInitialData json embedded
+        in the about page html, with a plain HTTP request, ie. without navigating the browser.
 
-        # Check if last character is a multiplier
-        if count_str[-1] in multipliers:
-            try:
-                number = float(count_str[:-1]) * multipliers[count_str[-1]]
-                return int(number)
-            except ValueError:
-                return 0
+        :param str channel_url: absolute channel url
+        :returns dict: Channel details, None if the page must be rendered instead
+        """
+        await self._limiter.acquire()
+        async with self._session.get(f"{channel_url}/about", params={"hl": "en"}) as response:
+            self._check_rate_limit(response)
+            # eg. redirected to consent.youtube.com
+            if response.status != 200 or response.url.host != 'www.youtube.com':
+                return None
+            html = await response.text()
+
+        # whatever the about json carries, usually the country only;
+        # render the page instead if it carries nothing
+        about = _parse_about_channel(_extract_json_literal(html, _INITIAL_DATA_RE) or {})
+        return about or None
+
+    async def _extract_channel_about(self, channel_url, page=None):
+        """
+        Extract country and language from the rendered channel about page.
 
+        :param str channel_url: absolute channel url
+        :param Page page: Playwright page object, navigated away from the video,
+            else a page of the shared context is borrowed
+        :returns dict: Channel details found on the about page
+        """
+        if page is None:
+            async with self._page_slots:
+                page = await self._acquire_page()
+                try:
+                    return await self._extract_channel_about(channel_url, page)
+                finally:
+                    self._release_page(page)
+
+        about = {}
+
+        # Navigate to About page for more details. Channel pages never go network idle,
+        # rather proceed as soon as the metadata extracted below is attached.
+        await self._goto(page, f"{channel_url}/about")
         try:
-            return int(count_str)
-        except ValueError:
-            return 0
+            await page.wait_for_selector(_CHANNEL_ABOUT_SELECTOR, state='attached', timeout=5000)
+        except Exception:
+            logging.debug('No country or language found for channel "%s"', channel_url)
+
+        # Extract country and language (limited accuracy via web scraping)
+        about_text = await page.evaluate(_CHANNEL_ABOUT_JS)
 
-    def _make_absolute_url(self, url):
-        """Whether url is FQDN and not relative"""
-        if not bool(urlparse(url).netloc):
-            url = urljoin('https://www.youtube.com', url)
-        return url
+        country_match = _COUNTRY_RE.search(about_text)
+        if country_match:
+            about["country"] = country_match.group(1).strip()
 
-    async def _extract_channel_details(self, page):
+        language_match = _LANGUAGE_RE.search(about_text)
+        if language_match:
+            language = language_match.group(1).strip()
+            about["language_name"] = language
+            about["language_code"] = map_language(language)
+
+        return about
+
+    async def _extract_channel_details(self, channel_url, page=None):
         """
         Extract advanced channel details.
+        About pages are fetched once per channel, then served from cache,
+        only rendered in the browser if they can't be fetched.
         
-        :param Page page: Playwright page object
+        :param str channel_url: channel link found on the video page
+        :param Page page: Playwright page object, if rendering the video already
         :returns dict: Channel details
         """
-        channel_details = {
-            "channel_id": "Unknown",
-            "subscribers_gained": 0,
-            "subscribers_lost": 0,
-            "country": "Unknown",
-            "language_name": "Unknown",
-            "language_code": "Unknown"
-        }
+        channel_details = dict(_CHANNEL_DEFAULTS)
 
         try:
-            # Try to extract channel URL and ID
-            # $$('yt-formatted-string.ytd-channel-name a')[0].href in chrome devtools
-            channel_link = await page.query_selector('yt-formatted-string.ytd-channel-name a')
-            if not channel_link:
+            if not channel_url:
                 raise AsyncException("Couldn't extract channel link")
 
             # Extract channel ID from URL
-            channel_url = await channel_link.get_attribute('href')
-            channel_url = self._make_absolute_url(channel_url)
-            channel_id_match = re.search(r'/@([^/]+)', channel_url)
+            channel_url = _make_absolute_url(channel_url)
+            channel_id_match = _CHANNEL_ID_RE.search(channel_url)
 
             if channel_id_match:
                 channel_details["channel_id"] = urllib.parse.unquote(
                     channel_id_match.group(1))
 
-            # Navigate to About page for more details
-            await page.goto(f"{channel_url}/about", wait_until='networkidle', timeout=IO_TIMEOUT)
-
-            # Try to extract country
-            try:
-                country_element = await page.query_selector('yt-formatted-string:has-text("Country")')
-                if country_element:
-                    country_text = await country_element.inner_text()
-                    channel_details["country"] = country_text.split(":")[1].strip()
-            except Exception:
-                pass
-
-            # Try to extract language (limited accuracy via web scraping)
-            try:
-                details_elements = await page.query_selector_all(
-                    'yt-formatted-string.ytd-channel-about-metadata-renderer')
-                for element in details_elements:
-                    text = await element.inner_text()
-                    # Basic language detection logic
-                    if "Language" in text:
-                        language_parts = text.split(":")
-                        if len(language_parts) > 1:
-                            language = language_parts[1].strip()
-                            channel_details["language_name"] = language
-                            channel_details["language_code"] = map_language(language)
-            except Exception:
-                pass
-
+            # Concurrent videos from the same channel wait for the first scrape
+            # and about pages scraped by previous runs are kept for SCRAPE_CACHE_TTL seconds
+            async with self._channel_locks[channel_url]:
+                if channel_url not in self._channel_cache:
+                    disk_key = ("channel", channel_url)
+                    about = self._disk_cache.get(disk_key) if self._disk_cache is not None else None
+                    if about is None:
+                        try:
+                            about = await self._fetch_channel_about(channel_url)
+                        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                            logging.debug('Could not fetch channel "%s": %s', channel_url, e)
+                        if about is None:
+                            about = await self._extract_channel_about(channel_url, page)
+                        if self._disk_cache is not None:
+                            self._disk_cache.set(disk_key, about, expire=SCRAPE_CACHE_TTL)
+                    self._channel_cache[channel_url] = about
+                channel_details.update(self._channel_cache[channel_url])
+
+        except RateLimitError:
+            # for the caller to retry once the limiter has slowed down
+            raise
         except Exception as e:
-            logging.debug(f'Error extracting channel details: {e}')
+            logging.debug('Error extracting channel details: %s', e)
 
         return channel_details
 
-    async def scrape_video_stats(self, video_id):
+    async def _fetch_video_stats(self, video_id):
         """
-        Scrape comprehensive statistics for a specific YouTube video.
+        Read video statistics from the InnerTube json api behind the watch page,
+        with plain HTTP requests, ie. without rendering the page.
+        Falls back to the player response embedded in the watch page html.
 
         :param str video_id: YouTube video ID
-        :returns dict: Detailed video statistics
+        :returns dict: Detailed video statistics, None if the page must be rendered instead
         """
 
-        page = None
-        video_url = f"https://www.youtube.com/watch?v={video_id}"
-        video_stats = {
-            "video_id": video_id,
-            "title": "Unknown",
-            "duration": "Unknown",
-            "view_count": 0,
-            "likes": 0,
-            "comments": 0,
-            "shares": 0,
-            "dislikes": 0,
-            "published_at": "Unknown",
-            "upload_date": "Unknown",
-            "channel_name": "Unknown",
-            "url": video_url,
-            "thumbnail_url": "Unknown",
-        }
-
+        video_stats = _new_video_stats(video_id)
+        player, watch_next = await asyncio.gather(
+            self._post_innertube('player', video_id), self._post_innertube('next', video_id))
+        player = player and orjson.loads(player)
+
+        html = ''
+        if not player or "videoDetails" not in player:
+            _raise_if_unavailable(video_id, player)
+            async with self._session.get(video_stats["url"]) as response:
+                self._check_rate_limit(response)
+                # eg. redirected to consent.youtube.com
+                if response.status == 200 and response.url.host == 'www.youtube.com':
+                    html = await response.text()
+                    player = _extract_player_response(html)
+        if not player or "videoDetails" not in player:
+            _raise_if_unavailable(video_id, player)
+            return None
+
+        video_stats.update(_parse_player_response(player))
+        like_count_match = _LIKE_COUNT_RE.search(watch_next or html)
+        if like_count_match:
+            video_stats["likes"] = int(like_count_match.group(1))
+
+        comments_text = watch_next and _parse_comments_count(orjson.loads(watch_next))
+        if comments_text:
+            video_stats["comments"] = self._parse_count(comments_text)
+
+        # Country and language of the channel, keeping the player's channel id
+        channel_url = player.get("microformat", {}) \
+            .get("playerMicroformatRenderer", {}).get("ownerProfileUrl")
+        channel_details = await self._extract_channel_details(channel_url)
+        channel_details.pop("channel_id", None)
+        video_stats.update(channel_details)
+
+        return video_stats
+
+    async def _post_innertube(self, endpoint, video_id):
+        """ Raw json response of an InnerTube api endpoint for a video, None on failure """
+
+        payload = {**_INNERTUBE_CONTEXT, "videoId": video_id}
         try:
-            # Create a new page in new browser context
-            page = await self.browser.new_page(locale='en-US')
-            page.set_default_timeout(IO_TIMEOUT)  
+            async with self._session.post(f"{_INNERTUBE_URL}/{endpoint}",
+                                          params={"prettyPrint": "false"}, json=payload) as response:
+                self._check_rate_limit(response)
+                if response.status != 200:
+                    return None
+                return await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logging.debug('InnerTube %s request failed for video "%s": %s', endpoint, video_id, e)
+            return None
 
-            # Navigate to the video page, wait for the page to fully load
-            # wait_until='networkidle' waits till there are no more than 0 network connections for at least 500 milliseconds.
-            # wait_until='domcontentloaded' => less strict page load condition
-            await page.goto(video_url, wait_until='domcontentloaded')  
+    async def scrape_video_stats(self, video_id):
+        """
+        Scrape comprehensive statistics for a specific YouTube video.
+        Reads the InnerTube json api directly, only falls back to rendering the page
+        with Playwright when no metadata can be read over HTTP (eg. consent wall).
 
-             # Wait for title to be visible (a safe indicator the page has loaded key elements)
-            await page.wait_for_selector('h1.ytd-watch-metadata yt-formatted-string', state='visible', timeout=90000)
+        :param str video_id: YouTube video ID
+        :returns Video: Detailed video statistics
+        """
 
-            # If the reels or video pages use iframes or lazy-loading content, you may need to scroll or interact:
-            await page.mouse.wheel(0, 1000)
-            
-            # Give JavaScript more time to execute
-            await asyncio.sleep(3)
+        if video_id in self._video_cache:
+            return self._video_cache[video_id]
 
-            # Extract video title
-            try:
-                title_element = await page.query_selector('h1.ytd-watch-metadata yt-formatted-string')
-                video_stats["title"] = await title_element.inner_text() if title_element else "Unknown Title"
-            except Exception as e:
-                logging.debug(f'Could not extract title for video "{video_id}": {e}')
+        video_stats = self._disk_cache.get(video_id) if self._disk_cache is not None else None
+        if video_stats is not None:
+            video = self._video_cache[video_id] = Video(**video_stats)
+            return video
 
-            # Extract view count
+        # on a 429, retry once the limiter has slowed down. Still rate limited
+        # after that: give up on the video, rendering would only add more requests
+        for attempt in range(_RATE_LIMIT_RETRIES + 1):
             try:
-                view_element = await page.query_selector('div#info span.ytd-video-view-count-renderer')
-                view_text = await view_element.inner_text() if view_element else "0 views"
-                video_stats["view_count"] = self._parse_count(view_text.split()[:-1])
-            except Exception as e:
-                logging.debug(f'Could not extract views for video "{video_id}": {e}')
+                async with self._limiter:
+                    video_stats = await self._fetch_video_stats(video_id)
+            except RateLimitError as e:
+                logging.debug('Video "%s", attempt %d: %s', video_id, attempt + 1, e)
+                rate_limit_error = e
+                continue
+            except (aiohttp.ClientError, asyncio.TimeoutError, orjson.JSONDecodeError) as e:
+                logging.debug('Could not fetch video "%s": %s', video_id, e)
+            break
+        else:
+            raise VideoError(video_id, f'Rate limited scraping video "{video_id}"', exc=rate_limit_error)
+
+        if video_stats is None:
+            async with self._page_slots:
+                video_stats = await self._render_video_stats(video_id)
+
+        logging.debug('Scraped video: %s (%s views)\n%s',
+                      video_stats['title'], video_stats['view_count'], video_stats)
+        video = self._video_cache[video_id] = Video(**video_stats)
+
+        # no channel details (eg. about page unreachable): look them up again sooner
+        if self._disk_cache is not None:
+            complete = any(video_stats.get(key, "Unknown") != "Unknown" for key in _CHANNEL_ABOUT_KEYS)
+            self._disk_cache.set(video_id, video_stats, expire=SCRAPE_CACHE_TTL if complete
+                                 else min(SCRAPE_CACHE_TTL, _INCOMPLETE_CACHE_TTL))
+        return video
+
+    async def _render_video_stats(self, video_id):
+        """
+        Scrape comprehensive statistics for a specific YouTube video,
+        rendering the watch page in the browser.
 
-            # Extract likes count - try multiple potential selectors
-            # Try to get aria-label first, fallback to inner text 
-            try:
-                like_selectors = [
-                    'ytd-menu-renderer button[aria-label*="like"]',
-                    'like-button-view-model button',
-                    'segmented-like-button-view-model button',
-                    '#top-level-buttons-computed button:first-child'
-                ]
-                for selector in like_selectors:
-                    like_element = await page.query_selector(selector)
-                    if like_element:
-                        like_text = await like_element.get_attribute('aria-label')
-                        if not like_text:
-                            like_text = await like_element.inner_text()
-                        if like_text:
-                            match = re.search(r'\b\d+(?:\.\d+)?[KM]?\b', like_text)
-                            video_stats["likes"] = self._parse_count(match.group())
-                            break
-            except Exception as e:
-                logging.debug(f'Could not extract likes for video "{video_id}": {e}')
-                video_stats["likes"] = 0
+        :param str video_id: YouTube video ID
+        :returns dict: Detailed video statistics
+        """
 
-            # Extract comments count
-            # Try to scroll down to make sure comments section is loaded
-            try:
+        page = context = None
+        video_stats = _new_video_stats(video_id)
+        video_url = video_stats["url"]
 
-                await page.wait_for_selector('#comments', timeout=5000)
-                await page.evaluate('''() => { window.scrollBy(0, 800); }''')
-
-                comment_selectors = [
-                    '#comments #count .count-text',
-                    'h2.ytd-comments-header-renderer',
-                    'yt-formatted-string.ytd-comments-header-renderer',
-                ]
-                for selector in comment_selectors:
-                    comments_element = await page.query_selector(selector)
-                    if comments_element:
-                        comments_text = await comments_element.inner_text()
-                        if comments_text:
-                            video_stats["comments"] = comments_text
-                            match = re.search(r'\b\d+(?:\.\d+)?[KM]?\b', comments_text)
-                            if match:
-                                video_stats["comments"] = self._parse_count(match.group())
-                            else:
-                                video_stats["comments"] = self._parse_count(comments_text.split()[0])
-                        break
-                
-            except Exception as e:
-                logging.debug(f'Could not extract comments for video "{video_id}": {e}')
+        try:
+            # Reuse a page of the shared browser context,
+            # or create one in a context of its own for isolation
+            if self.isolate_contexts:
+                async with self._context_lock:
+                    context = await self._new_context()
+                page = await context.new_page()
+                page.set_default_timeout(IO_TIMEOUT)
+            else:
+                page = await self._acquire_page()
+
+            # Navigate to the video page, proceed as soon as the player response is set
+            # wait_until='domcontentloaded' => less strict page load condition
+            await self._goto(page, video_url)
+            await page.wait_for_function(_PLAYER_READY_JS)
+
+            # Comments are lazy-loaded: scroll their section into view to trigger loading
+            try:
+                await page.locator('#comments').scroll_into_view_if_needed(timeout=3000)
+            except Exception:
+                logging.debug('No comments section for video "%s"', video_id)
+
+            # Give JavaScript time to render the like button and the comments header
+            # loaded by the scroll above, no longer than it needs
+            for selector, timeout in ((_LIKES_SELECTOR, 10000), (_COMMENTS_SELECTOR, 5000)):
+                try:
+                    await page.wait_for_selector(selector, state='attached', timeout=timeout)
+                except Exception:
+                    logging.debug('"%s" not rendered for video "%s"', selector, video_id)
+
+            # Extract title, view count, dates, duration, thumbnail and channel from
+            # the embedded player response, as on the HTTP path, likes and comments
+            # from the page, all in a single round-trip to the browser
+            page_fields = await page.evaluate(_PAGE_FIELDS_JS, [_LIKES_SELECTOR, _COMMENTS_SELECTOR])
+            player = page_fields["player"] or {}
+            if "videoDetails" not in player:
+                status = player.get("playabilityStatus", {})
+                raise AsyncException(status.get("reason") or "No player response found")
+            video_stats.update(_parse_player_response(player))
+
+            # Extract likes count, read along with the player response above,
+            # eg. "like this video along with 1,234 other people"
+            like_match = page_fields["likes"] and _NUMBER_RE.search(page_fields["likes"].replace(',', ''))
+            if like_match:
+                video_stats["likes"] = self._parse_count(like_match.group())
+
+            # Extract comments count, eg. "1,234 Comments"
+            comments_match = page_fields["comments"] and _NUMBER_RE.search(page_fields["comments"].replace(',', ''))
+            if comments_match:
+                video_stats["comments"] = self._parse_count(comments_match.group())
 
 
             # Extract shares count (challenging to scrape accurately)
@@ -270,41 +758,45 @@ class YouTubeVideoScraper:
             # Extract dislikes (no longer directly shown on YouTube)
             dislikes = 0  # Dislikes are hidden on YouTube
 
-            # Extract publish date. using locale='en-US' in browser context
-            # preferring locator api https://stackoverflow.com/a/76745106/4615806
-            try:
-                date_element = page.locator('div#info yt-formatted-string.ytd-video-primary-info-renderer')
-                video_stats["published_at"] = await date_element.all_inner_texts() if date_element else "Unknown Date"
-                video_stats["published_at"] = parser.parse(" ".join(video_stats["published_at"]), fuzzy=True)
-            except Exception:
-                logging.debug(f'Could not extract publish date for video "{video_id}": {e}')
-
-            # Extract duration from iso8601 into seconds
-            video_stats["duration"] = await page.evaluate(
-                """document.querySelector('meta[itemprop=\"duration\"]').content""")
-
-            # Extract channel name
-            try:
-                channel_element = await page.query_selector('yt-formatted-string.ytd-channel-name a')
-                video_stats["channel_name"] = await channel_element.inner_text() if channel_element else "Unknown Channel"
-            except Exception:
-                logging.debug(f'Could not extract channel name for video "{video_id}": {e}')
-
             # TODO: this is unstable
-            # Extract additional channel details
-            channel_details = await self._extract_channel_details(page)
+            # Extract additional channel details, keeping the player's channel id
+            channel_url = player.get("microformat", {}) \
+                .get("playerMicroformatRenderer", {}).get("ownerProfileUrl")
+            channel_details = await self._extract_channel_details(channel_url, page)
             if channel_details:
+                channel_details.pop("channel_id", None)
                 video_stats.update(channel_details)
 
         except Exception as e:
             raise VideoError(video_id, f'Error scraping video "{video_id}"', exc=e)
 
         finally:
-            if page:
-                await page.close()
+            if context:
+                await context.close()
+            elif page:
+                self._release_page(page)
 
-        logging.debug(f"Scraped video: {video_stats['title']} ({video_stats['view_count']} views)\n", video_stats)
-        return Video(**video_stats)
+        return video_stats
+
+    async def _acquire_page(self):
+        """ Idle page of the shared context, else a new one if under `concurrency` pages """
+        if self._pages.empty() and self._pages_opened < self.concurrency:
+            self._pages_opened += 1
+            try:
+                page = await self.context.new_page()
+            except Exception:
+                self._pages_opened -= 1
+                raise
+            page.set_default_timeout(IO_TIMEOUT)
+            return page
+        return await self._pages.get()
+
+    def _release_page(self, page):
+        """ Return a page to the pool, unless it was closed (eg. crashed) """
+        if page.is_closed():
+            self._pages_opened -= 1
+        else:
+            self._pages.put_nowait(page)
 
 
     async def scrape_multiple_videos(self, video_ids, progress_callback=None, **pipeline_kwargs):
@@ -312,6 +804,8 @@ class YouTubeVideoScraper:
         Scrape multiple videos concurrently with progress tracking.
         Pushes results to data pipeline for saving to permanent storage reliably.
         Uses Playwright automation to wait on Javascript, pop ups, etc.
+        Async generator: yields (item, err_code) tuples in completion order,
+        so that one slow video does not hold back the entire result set.
 
         Args:
             video_ids:
@@ -319,13 +813,10 @@ class YouTubeVideoScraper:
             video_ids list: List of YouTube video IDs
             pipeline_kwargs dict: optional kwargs for the data pipeline
 
-
-        TODO: async generator -> yield datum one by one not to compromise entire result set
-
             {
             "video_id": "uuo2KqoJxsc",
             "title": "God's Rescue Plan",
-            "duration": "PT2H30M",
+            "duration": 9000,
             "published_at": "",
             "upload_date": "2023-04-13 00:00:00",
             "view_count": 4597725,
@@ -348,16 +839,18 @@ class YouTubeVideoScraper:
 
         """
 
-        async def _scrape_to_pipeline(pipeline: DataPipeline, task_index, video_id):
+        task_counter = itertools.count()
+
+        async def _scrape_to_pipeline(pipeline: DataPipeline, video_id):
             """
             # TODO: only AsyncException are currently properly formatted for saving to csv
             Args:
                 pipeline :
-                task_index:
-                video_id:
+                video_id: YouTube video ID, numbered in order of start
 
             Returns:
             """
+            task_index = next(task_counter)
             try:
                 if progress_callback:
                     await progress_callback(task_index, video_id)
@@ -366,49 +859,70 @@ class YouTubeVideoScraper:
                 return await pipeline.enqueue(asdict(video)), 0
 
             except Exception as e:
-                logging.debug(str(e))
+                logging.debug('Scrape error for video "%s": %s', video_id, e)
                 return await pipeline.enqueue(e.__dict__, is_error=True), -1
 
-        async def run_tasks(video_ids: [str]):
-            """ Scrape (with rate control) and save videos to the data pipeline  """
-
-            async with DataPipeline(**pipeline_kwargs) as pipeline:
+        # Duplicate ids would be scraped concurrently, keep first occurrences
+        video_ids = list(dict.fromkeys(video_ids))
 
-                desc = f'asynchronously scraping {len(video_ids)} videos'
-                return await aiometer.run_all([
-                    functools.partial(_scrape_to_pipeline, pipeline, i, v)
-                    for i, v in enumerate(tqdm(video_ids, desc=desc))
-                ], max_per_second=self.max_per_second, max_at_once=self.concurrency)
+        # Scrape (rate controlled by self._limiter, cache hits aside) and save videos to the data pipeline,
+        # streaming each result out as soon as its task completes.
+        # Scrapers only wait on the csv writer if it lags a couple of rounds behind.
+        pipeline_kwargs = {"queue_maxsize": 2 * self.concurrency, **pipeline_kwargs}
+        async with DataPipeline(**pipeline_kwargs) as pipeline:
 
-        return await run_tasks(video_ids)
+            # progress counts completed videos, not scheduled ones
+            desc = f'asynchronously scraping {len(video_ids)} videos'
+            with tqdm(total=len(video_ids), desc=desc) as progress:
+                async with aiometer.amap(
+                    functools.partial(_scrape_to_pipeline, pipeline), video_ids,
+                    max_at_once=self.concurrency
+                ) as results:
+                    async for result in results:
+                        progress.update(1)
+                        yield result
 
 
-async def scrape_multiple_videos(video_ids, progress_callback=None, **pipeline_kwargs):
+async def stream_multiple_videos(video_ids, progress_callback=None, **pipeline_kwargs):
     """
     Scrape videos from YouTube website.
+    Async generator yielding (item, err_code) tuples as soon as each video is scraped.
     """
 
     # Create scraper and scrape videos concurrently
     async with YouTubeVideoScraper() as scraper:
 
-        results = defaultdict(list)
-        response = await scraper.scrape_multiple_videos(
+        response = scraper.scrape_multiple_videos(
             video_ids, progress_callback=progress_callback, **pipeline_kwargs)
 
-        for item, err_code in response:
-            key = 'videos' if err_code > -1 else 'errors'
-            item = asdict(item)
-            results[key] += [item]
+        # items come out of the pipeline already as dicts
+        async for item, err_code in response:
+            yield item, err_code
 
-        return results
+
+async def scrape_multiple_videos(video_ids, progress_callback=None, **pipeline_kwargs):
+    """
+    Scrape videos from YouTube website.
+    """
+
+    videos, errors = [], []
+    response = stream_multiple_videos(
+        video_ids, progress_callback=progress_callback, **pipeline_kwargs)
+
+    async for item, err_code in response:
+        (videos if err_code > -1 else errors).append(item)
+
+    return {'videos': videos, 'errors': errors}
 
 
 if __name__ == "__main__":
     """
     Example usage: python lib/scraper.py
-    Watch for output file: data/youtube_video_stats.json
+    Watch for output file: data/youtube_video_stats.jsonl
     """
 
+    install_uvloop()
+
     # video IDs (replace with actual video IDs)
     video_ids = [
 
@@ -432,11 +946,15 @@ if __name__ == "__main__":
     async def print_progress(completed: int, current_video: str):
         print(f"Progress: {completed} videos scraped. Currently processing: {current_video}")
 
-    results = asyncio.run(scrape_multiple_videos(
-        video_ids, progress_callback=print_progress, **pipeline_kwargs))
+    # optionally, save results to a JSON lines file, one record as soon as each video is scraped,
+    # err_code telling videos (0) from errors (-1)
+    async def save_results(output_path):
+        with open(output_path, 'wb') as f:
+            async for item, err_code in stream_multiple_videos(
+                    video_ids, progress_callback=print_progress, **pipeline_kwargs):
+                f.write(orjson.dumps({"err_code": err_code, **item},
+                                     default=str, option=orjson.OPT_APPEND_NEWLINE))
+
+    asyncio.run(save_results('data/youtube_video_stats.jsonl'))
 
-    # optionally, save results to a JSON file
-    with open('../data/youtube_video_stats.json', 'w', encoding='utf-8-sig') as f:
-        print(json.dumps(results, indent=2))
-        json.dump(results, f, indent=2, ensure_ascii=False)
 
@@ -51,7 +51,8 @@ class ResumableDictWriter:
         """ Enter the context manager, setting up CSV DictWriter with appropriate mode."""
 
         mode = 'a' if (self.last_position > 0 or file_exists(self.output_file)) else 'w'
-        self.file = open(self.output_file, mode, newline='', encoding="utf-8-sig")
+        self.file = open(self.output_file, mode, newline='', encoding="utf-8-sig",
+                         buffering=1 << 20)
         self.writer = csv.DictWriter(self.file, fieldnames=self.fieldnames, **self.csv_kwargs)
 
         # Store initial file size for byte counting
@@ -120,12 +121,13 @@ class ResumableDictWriter:
 
         try:
 
-            # Write data respecting columns order
-            for i, row in enumerate(rows[self.last_position:], self.last_position):
-                self.writer.writerow({f: row[f] for f in self.fieldnames})
-                self.file.flush()
-                self.last_position = i + 1
-                self._save_checkpoint()
+            # Write data respecting columns order, in one go:
+            # a single flush and checkpoint per batch of rows
+            pending = rows[self.last_position:]
+            self.writer.writerows({f: row.get(f) for f in self.fieldnames} for row in pending)
+            self.file.flush()
+            self.last_position += len(pending)
+            self._save_checkpoint()
 
             # Calculate final statistics
             final_file_pos = self.file.tell()
@@ -1,31 +1,62 @@
 """
 Extract metadata from YouTube videos 
-using the [google-api-python-client](https://googleapis.github.io/google-api-python-client/)
-Based on YouTube Data API (v3) 
+using async [aiohttp](https://docs.aiohttp.org/) requests to the REST endpoints
+of the YouTube Data API (v3) 
 
 """
 
-import functools
 import os
 import logging
+import pathlib
+import random
 from collections import defaultdict
 
-import aiometer
+import aiohttp
 import asyncio
-from glom import glom
+import diskcache
+import orjson
+from aiohttp.resolver import AsyncResolver
 from tqdm import tqdm
-from googleapiclient.discovery import build
 
 from models import DataPipeline, Video, fields, asdict
+from lib.exceptions import VideoError
+from lib.rate_limit import AdaptiveRateLimiter, retry_after
 from helpers import \
     IO_CONCURRENCY_LIMIT, IO_BATCH_SIZE, IO_RATE_LIMIT, \
-    LOG_LEVEL, YT_API_KEY, \
-    map_language
+    LOG_LEVEL, YT_API_KEY, CACHE_DIR, API_CACHE_TTL, \
+    install_uvloop, map_language
 
 
-logging.basicConfig(level=LOG_LEVEL)
+logger = logging.getLogger(__name__)
 
-youtube = build('youtube', 'v3', developerKey=YT_API_KEY)
+# YouTube Data API videos.list, called directly rather than through googleapiclient's blocking client
+_VIDEOS_URL = "https://www.googleapis.com/youtube/v3/videos"
+_VIDEO_PARTS = "snippet,contentDetails,statistics,recordingDetails"
+
+# partial response: only the fields parse_video() reads, and the etag to revalidate with
+_VIDEO_FIELDS = "etag,items(id," \
+    "snippet(title,publishedAt,channelId,channelTitle,defaultAudioLanguage,thumbnails/default/url)," \
+    "contentDetails/duration,statistics(viewCount,commentCount,likeCount),recordingDetails/recordingDate)"
+
+# seconds a batch response's ETag is kept to revalidate the batch with, past API_CACHE_TTL
+_ETAG_CACHE_TTL = 30 * 24 * 60 * 60
+
+# times a batch is retried, after a 429, a 5xx, a connection error or a timeout
+_BATCH_RETRIES = 3
+
+# one HTTP session, ie. one pool of kept-alive TLS connections to the API,
+# shared by every fetch in the running event loop, see _get_session()
+_session = None
+_session_loop = None
+
+
+def _g(d, *keys, default=''):
+    """ Nested dict lookup, eg. _g(item, 'snippet', 'channelId') """
+    for key in keys:
+        d = d.get(key) if isinstance(d, dict) else None
+        if d is None:
+            return default
+    return d
 
 
 def parse_video(item):
@@ -33,16 +64,16 @@ def parse_video(item):
 
     # Extract language and country codes from locale code eg. 'en-US'
     langage_code, country_code, *_  = \
-        glom(item, 'snippet.defaultAudioLanguage', default='-').split('-')
+        _g(item, 'snippet', 'defaultAudioLanguage', default='-').split('-')
 
     video = Video(
         video_id=item['id'],
         title=item['snippet']['title'],
         published_at=item['snippet']['publishedAt'],
-        upload_date=glom(item, 'recordingDetails.recordingDate', default=''),
-        channel_id=glom(item, 'snippet.channelId', default=''),
-        channel_name=glom(item, 'snippet.channelTitle', default=''),
-        thumbnail_url=glom(item, 'snippet.thumbnails.default.url', default=''),
+        upload_date=_g(item, 'recordingDetails', 'recordingDate'),
+        channel_id=_g(item, 'snippet', 'channelId'),
+        channel_name=_g(item, 'snippet', 'channelTitle'),
+        thumbnail_url=_g(item, 'snippet', 'thumbnails', 'default', 'url'),
         duration=item['contentDetails']['duration'],
         view_count=item['statistics']['viewCount'],
         comments=item['statistics']['commentCount'],
@@ -53,10 +84,54 @@ def parse_video(item):
         country = country_code
     )
 
-    logging.debug(f"Parsed video : {item['id']}", video)
+    logger.debug("Parsed video : %s", video)
     return video
 
 
+def _get_session():
+    """ Shared API session, (re)created on first use in the running event loop """
+    global _session, _session_loop
+
+    loop = asyncio.get_running_loop()
+    if _session is None or _session.closed or _session_loop is not loop:
+        connector = aiohttp.TCPConnector(
+            resolver=AsyncResolver(), ttl_dns_cache=300, limit=IO_CONCURRENCY_LIMIT,
+            limit_per_host=IO_CONCURRENCY_LIMIT, keepalive_timeout=75, enable_cleanup_closed=True)
+        _session = aiohttp.ClientSession(connector=connector)
+        _session_loop = loop
+    return _session
+
+
+async def close_session():
+    """ Close the shared API session, eg. before the event loop shuts down """
+    global _session, _session_loop
+
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = _session_loop = None
+
+
+async def fetch_videos_batch(session, video_ids, etag=None):
+    """
+    Fetch a single batch of videos from the YouTube Data API.
+    Note: YouTube denies more than 50 video ids per request
+
+    :param aiohttp.ClientSession session: HTTP session
+    :param list video_ids: at most IO_BATCH_SIZE video ids
+    :param str etag: ETag of a previous response for the same video ids, if any
+    :returns dict: videos.list response, with the videos as 'items',
+        None if not modified since the response `etag` came with
+    """
+
+    params = {"part": _VIDEO_PARTS, "fields": _VIDEO_FIELDS, "id": ','.join(video_ids), "key": YT_API_KEY}
+    headers = {"If-None-Match": etag} if etag else None
+    async with session.get(_VIDEOS_URL, params=params, headers=headers) as response:
+        if response.status == 304:
+            return None
+        response.raise_for_status()
+        return await response.json(loads=orjson.loads)
+
+
 async def fetch_multiple_videos(video_ids, progress_callback=None, **pipeline_kwargs):
     """
     Return data (metadata and statistics) for a single video.
@@ -66,60 +141,128 @@ async def fetch_multiple_videos(video_ids, progress_callback=None, **pipeline_kw
     https://developers.google.com/youtube/v3/determine_quota_cost
     """
 
+    # coerces video_ids into a list, sliced into batches below.
+    # Duplicate ids would cost quota once per occurrence, keep first occurrences
+    if isinstance(video_ids, str):
+        video_ids = video_ids.split(',')
+    video_ids = list(dict.fromkeys(video_ids))
     num_videos = len(video_ids)
-    num_batches = min(int(len(video_ids) / IO_BATCH_SIZE), 10000) + 1
 
-    async def _parse_to_pipeline(pipeline, task_index, item):
+    async def _parse_to_pipeline(pipeline, cache, task_index, item):
 
         try:
             if progress_callback:
                 await progress_callback(task_index, item)
 
-            v = parse_video(item)  # validate the data!
-            return await pipeline.enqueue(asdict(v)), 0
+            v = asdict(parse_video(item))  # validate the data!
+            if cache is not None:
+                cache.set(v['video_id'], v, expire=API_CACHE_TTL)
+            return await pipeline.enqueue(v), 0
 
         except Exception as e:
             # TODO: only AsyncException are currently properly formatted for savin to csv
-            await pipeline.enqueue(e.__dict__, is_error=True), -1
+            return await pipeline.enqueue(e.__dict__, is_error=True), -1
 
 
     async def run_tasks(video_ids: list[str]):
 
         results = defaultdict(list)
 
-        async with DataPipeline(**pipeline_kwargs) as pipeline:
-
-            for i in range(num_batches):
-
-                # coerces video_ids into an iterable
-                if not hasattr(video_ids, '__iter__'):
-                    assert isinstance(video_ids, str), f"Invalid arg 'video_ids' {type(video_ids)}"
-                    video_ids = video_ids.split(',')
-
-                # prepare fetch request
-                # Note: YouTube denies more than 50 video ids per request
-                id_list = list(video_ids)[i * IO_BATCH_SIZE: (i + 1) * IO_BATCH_SIZE]
-                request = youtube.videos().list(
-                    part="snippet,contentDetails,statistics",
-                    id=','.join(list(id_list)))
+        semaphore = asyncio.Semaphore(IO_CONCURRENCY_LIMIT)
+        limiter = AdaptiveRateLimiter(IO_RATE_LIMIT)
+        session = _get_session()
 
-                # fetch batches of IO_DATA_QUEUE_LIMIT videos ...
-                response = request.execute()
+        # videos fetched by previous runs, by id, for API_CACHE_TTL seconds
+        cache = diskcache.Cache(pathlib.Path(CACHE_DIR, 'api_videos')) \
+            if API_CACHE_TTL > 0 else None
 
-                batch_desc = 'fetching batch #{current} ie. videos {start}-{end}/{num_videos}: ' \
-                    .format(**{"current": i + 1, "start": 1 + i * IO_BATCH_SIZE,
-                               "end": min((i + 1) * IO_BATCH_SIZE, num_videos),
-                               "num_videos": num_videos})
-
-                tasks = [functools.partial(_parse_to_pipeline, pipeline, i, v)
-                         for i, v in enumerate(tqdm(response['items'], desc=batch_desc))]
-
-                for item, err_code in (await aiometer.run_all(
-                  tasks, max_per_second=IO_RATE_LIMIT, max_at_once=IO_CONCURRENCY_LIMIT)
-                ):
-                    key = 'videos' if err_code > -1 else 'errors'
-                    item = asdict(item)
-                    results[key] += [item]
+        try:
+            async with DataPipeline(**pipeline_kwargs) as pipeline:
+
+                # serve cached videos right away, only the others cost API quota
+                missing_ids = []
+                for video_id in video_ids:
+                    video = cache.get(video_id) if cache is not None else None
+                    if video is None:
+                        missing_ids.append(video_id)
+                    else:
+                        results['videos'].append(await pipeline.enqueue(video))
+
+                num_batches = (len(missing_ids) + IO_BATCH_SIZE - 1) // IO_BATCH_SIZE
+                desc = f'fetching {len(missing_ids)}/{num_videos} videos in {num_batches} batches'
+                with tqdm(total=len(missing_ids), desc=desc) as progress:
+
+                    async def fetch_batch(id_list, etag=None, attempt=0):
+                        # one batch of IO_BATCH_SIZE videos, retried if the API is overloaded
+                        try:
+                            async with semaphore, limiter:
+                                return await fetch_videos_batch(session, id_list, etag=etag)
+                        except aiohttp.ClientResponseError as e:
+                            if (e.status != 429 and e.status < 500) or attempt >= _BATCH_RETRIES:
+                                raise
+                            # API overloaded: back off, then retry the same batch. Any number
+                            # of ids costs one request and one quota unit, splitting would add some
+                            logger.debug("Batch of %d videos failed (%s), retrying", len(id_list), e.status)
+                            limiter.throttle(retry_after(e))
+                            return await fetch_batch(id_list, etag, attempt + 1)
+                        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                            if attempt >= _BATCH_RETRIES:
+                                raise
+                            # transient network error: retry after an exponential, jittered delay
+                            logger.debug("Batch of %d videos failed (%r), retrying", len(id_list), e)
+                            await asyncio.sleep(random.uniform(0, 2 ** (attempt + 1)))
+                            return await fetch_batch(id_list, etag, attempt + 1)
+
+                    async def run_batch(id_list, first_index):
+                        # fetch batches of IO_BATCH_SIZE videos, all of them concurrently,
+                        # parsing each one to the pipeline as soon as it arrives
+
+                        # same batch as a previous run: only download it again if it changed
+                        batch_key = ('etag', *id_list)
+                        batch = cache.get(batch_key) if cache is not None else None
+                        try:
+                            response = await fetch_batch(id_list, etag=batch and batch['etag'])
+                            items = batch['videos'] if response is None else response['items']
+                        except Exception as e:
+                            # eg. quota exceeded: save this batch's videos as errors,
+                            # rather than cancel the other batches and lose their results
+                            logger.debug("Batch of %d videos failed: %r", len(id_list), e)
+                            for video_id in id_list:
+                                error = VideoError(video_id, f'Error fetching video "{video_id}"', exc=e)
+                                results['errors'].append(await pipeline.enqueue(error.__dict__, is_error=True))
+                            progress.update(len(id_list))
+                            return
+
+                        if response is None:
+                            found = {video['video_id'] for video in items}
+                            for video in items:
+                                cache.set(video['video_id'], video, expire=API_CACHE_TTL)
+                                results['videos'].append(await pipeline.enqueue(video))
+                        else:
+                            found = {v.get('id') for v in items}
+                            videos = []
+                            for task_index, v in enumerate(items, start=first_index):
+                                item, err_code = await _parse_to_pipeline(pipeline, cache, task_index, v)
+                                results['videos' if err_code > -1 else 'errors'].append(item)
+                                if err_code > -1:
+                                    videos.append(item)
+                            if cache is not None and response.get('etag'):
+                                cache.set(batch_key, {'etag': response['etag'], 'videos': videos},
+                                          expire=_ETAG_CACHE_TTL)
+
+                        # deleted or private videos are simply left out of the response
+                        for video_id in id_list:
+                            if video_id not in found:
+                                error = VideoError(video_id, f'Video "{video_id}" not found')
+                                results['errors'].append(await pipeline.enqueue(error.__dict__, is_error=True))
+                        progress.update(len(id_list))
+
+                    async with asyncio.TaskGroup() as tg:
+                        for i in range(0, len(missing_ids), IO_BATCH_SIZE):
+                            tg.create_task(run_batch(missing_ids[i: i + IO_BATCH_SIZE], i))
+        finally:
+            if cache is not None:
+                cache.close()
 
         return results
 
@@ -132,17 +275,20 @@ if __name__ == '__main__':
     """
     import pandas as pd
 
+    logging.basicConfig(level=LOG_LEVEL)
+    install_uvloop()
+
     async def print_progress(completed: int, current_video: str):
         print(f"Progress: {completed} videos completed. Currently processing: {current_video}")
 
 
     dry_run = False
     csv_input_path = '../data/video-ids-three.csv'
-    csv_output_path = f"{csv_input_path}-api-out.xlsx"
+    csv_output_path = f"{csv_input_path}-api-merged.csv"
 
     pipeline_kwargs = {
         "name": "Fetch videos using the YouTube Data API v3",
-        "csv_output_path": csv_output_path,
+        "csv_output_path": f"{csv_input_path}-api-out.csv",
         "dry_run": False,
     }
 
@@ -154,17 +300,22 @@ if __name__ == '__main__':
     # df.dropna(inplace=True)
     video_ids = df['yt_video_id']
 
-    # fetch videos using the yt api
-    results = asyncio.run(fetch_multiple_videos(
-        video_ids, progress_callback=print_progress, **pipeline_kwargs))
+    # fetch videos using the yt api, then release the shared HTTP session
+    async def fetch_videos():
+        try:
+            return await fetch_multiple_videos(
+                video_ids, progress_callback=print_progress, **pipeline_kwargs)
+        finally:
+            await close_session()
+
+    results = asyncio.run(fetch_videos())
 
-    # save fetched video items (dict) to memory dataframe
-    for item in results['videos']:
-        video_id = item["video_id"]
-        df.loc[video_id] = {
-            **df.loc[video_id].to_dict(), **item}
+    # merge fetched video items (dict) into memory dataframe in one pass
+    if results['videos']:
+        fetched = pd.DataFrame(results['videos']).set_index('video_id')
+        df.update(fetched.astype(str))
 
     # optionally save to csv file
     if not dry_run:
-        logging.info(f'saving result to: {csv_output_path}')
-        df.to_excel(csv_output_path, engine='xlsxwriter', index=False)
+        logger.info('saving result to: %s', csv_output_path)
+        df.to_csv(csv_output_path, index=False)
@@ -1,4 +1,5 @@
 import time
+import asyncio
 import logging
 from collections import Counter
 
@@ -11,22 +12,34 @@ __all__ = (
 )
 
 
+# marks the end of the queue for the csv writer
+_CLOSE = object()
+# asks the csv writer to save its partial batch right away
+_FLUSH = object()
+
+
 class DataPipeline:
     """
     Datatype-agnostic pipeline that batch-saves queued data (dict)
     to a csv file asynchronously.
+    A single writer task consumes the queue, saving up to `data_queue_limit`
+    items per batch, or whatever was queued within `flush_timeout` seconds,
+    or at once when drained or closed.
+    A bounded queue (`queue_maxsize` > 0) holds producers back only when
+    the writer lags that many items behind.
     Nota: Using no pandas dataframe here, be as fast as possible
     """
 
     def __init__(self, csv_output_path=None, fields=None,
-                 data_queue_limit=IO_BATCH_SIZE,
-                 dry_run=False, name=None):
+                 data_queue_limit=IO_BATCH_SIZE, flush_timeout=1.0,
+                 queue_maxsize=0, dry_run=False, name=None):
 
         """ Initialize the data pipeline. """
 
-        self.data_queue = []
-        self.errors_queue = []
+        self.queue = asyncio.Queue(maxsize=queue_maxsize)
         self.data_queue_limit = data_queue_limit
+        self.flush_timeout = flush_timeout
+        self._writer = None
 
         self.fields = fields
         self.dry_run = dry_run
@@ -38,31 +51,31 @@ class DataPipeline:
             started_at=None, ended_at=None
         )
 
-        if csv_output_path:
-            self.csv_output_path = csv_output_path
-            self.err_output_path = "{}-errors.csv".format(csv_output_path)
+        self.csv_output_path = csv_output_path
+        self.err_output_path = "{}-errors.csv".format(csv_output_path) \
+            if csv_output_path else None
 
     async def __aenter__(self):
 
         # TODO: backup existing output files
         if not self.dry_run:
             for path in (self.csv_output_path, self.err_output_path):
-                remove_file(self.csv_output_path)
+                remove_file(path)
                 logging.warning(f'Deleted existing data from "{path}"')
 
         self.stats["started_at"] = time.time()
+        self._writer = asyncio.create_task(self._write_batches())
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """ Close pipeline after saving remaining data. """
 
-        if len(self.data_queue) > 0:
+        # let the writer flush remaining data from the queue right away,
+        # re-raising its exception if it died with items left unsaved
+        await self._unless_writer_fails(self.queue.put(_CLOSE))
+        await self._writer
 
-            # flush remaining data from all queues
-            queues = (self._get_queue(), self._get_queue(is_error=True))
-            for queue, output_path, counts in queues:
-                written = save_to_csv(queue, output_path)
-                counts.update(saved=written.items_written, bytes=written.bytes_written)
+        if self.stats["data_queue"]["queued"] or self.stats["errors_queue"]["queued"]:
 
             self.stats["ended_at"] = time.time()
 
@@ -86,8 +99,8 @@ class DataPipeline:
                 .format(**msg_kwargs))
 
     async def enqueue(self, item, is_error=False, **kwargs):
-        """ Enqueue a data item to the pipeline
-        and save data if queue limit is reached.
+        """ Enqueue a data item to the pipeline.
+        Saving happens in batches, off the caller, by the writer task.
 
         :param dict item: item to enqueue
         :param bool is_error: kind of item
@@ -97,33 +110,98 @@ class DataPipeline:
         """
 
         try:
-            if not isinstance(item, dict):
-                raise AsyncException(f"item for queue must be a dict, got {type(item)}")
+            return self.enqueue_nowait(item, is_error, **kwargs)
+        except asyncio.QueueFull:
+            # backpressure: wait for the writer to catch up
+            await self._unless_writer_fails(self.queue.put(self._new_entry(item, is_error, kwargs)))
+            self._get_queue(is_error)[1].update(queued=1)
+            return item
 
-            data_queue, output_path, counts = self._get_queue(is_error)
-            data_queue.append({**item, **kwargs})
-            counts.update(queued=1)
+    def enqueue_nowait(self, item, is_error=False, **kwargs):
+        """ Enqueue a data item to the pipeline, without yielding to the event loop:
+        producers (eg. scraping tasks) never wait on the writer task.
+        Same params and return value as `enqueue()`, raises asyncio.QueueFull
+        if the queue is bounded and full.
+        """
 
-            if len(self.data_queue) >= self.data_queue_limit \
-                    and not self.dry_run:
-                written = save_to_csv(data_queue, output_path)
+        self.queue.put_nowait(self._new_entry(item, is_error, kwargs))
+        self._get_queue(is_error)[1].update(queued=1)
+        return item
+
+    async def drain(self):
+        """ Wait until every item queued so far is saved (or skipped in dry run). """
+        await self._unless_writer_fails(self.queue.put(_FLUSH))
+        await self._unless_writer_fails(self.queue.join())
+
+    async def _unless_writer_fails(self, coro):
+        """ Await coro, unless the writer task dies first: items it left on
+        the queue would never be saved, nor marked done. Raise its exception then. """
+
+        task = asyncio.ensure_future(coro)
+        done, _ = await asyncio.wait((task, self._writer), return_when=asyncio.FIRST_COMPLETED)
+        if task not in done:
+            task.cancel()
+            self._writer.result()
+            raise AsyncException("Pipeline writer stopped before the queue was closed")
+        return task.result()
+
+    @staticmethod
+    def _new_entry(item, is_error, kwargs):
+        """ Queue entry for an item: (row, is_error) """
+
+        if not isinstance(item, dict):
+            e = AsyncException(f"item for queue must be a dict, got {type(item)}")
+            logging.error(f"Couldn't queue item {item!r}: {e}")
+            raise e
+        return {**item, **kwargs}, is_error
+
+    async def _write_batches(self):
+        """ Writer task: drain the queue and save items in batches. """
+
+        closing = False
+        while not closing:
+
+            batch, sentinel = [], None
+            entry = await self.queue.get()
+            try:
+                while True:
+                    if entry is _CLOSE or entry is _FLUSH:
+                        sentinel = entry
+                        break
+                    batch.append(entry)
+                    if len(batch) >= self.data_queue_limit:
+                        break
+                    entry = await asyncio.wait_for(self.queue.get(), self.flush_timeout)
+            except asyncio.TimeoutError:
+                pass
+            closing = sentinel is _CLOSE
+
+            try:
+                if batch and not self.dry_run:
+                    await asyncio.to_thread(self._save_batch, batch)
+            finally:
+                for _ in range(len(batch) + (sentinel is not None)):
+                    self.queue.task_done()
+
+    def _save_batch(self, batch):
+        """ Save a batch of (item, is_error) entries, one csv write per queue. """
+
+        for is_error in (False, True):
+            rows = [item for item, error in batch if error is is_error]
+            if not rows:
+                continue
+
+            output_path, counts = self._get_queue(is_error)
+            written = save_to_csv(rows, output_path)
+            if written:
                 counts.update(saved=written.items_written, bytes=written.bytes_written)
-                data_queue.clear()
-
-            return item
-
-        except Exception as e:
-            logging.error(f"Couldn't queue item  {self.last_position}: {e}")
-            raise
 
     def _get_queue(self, is_error=False):
-        """ Set the data or error queue to be the current queue"""
+        """ Output path and counters of the data or error queue """
 
-        data_queue, output_path, counts = (
-            self.data_queue, self.csv_output_path, self.stats["data_queue"]
+        output_path, counts = (
+            self.csv_output_path, self.stats["data_queue"]
         ) if not is_error else (
-            self.errors_queue,
-            self.err_output_path,
-            self.stats["errors_queue"]
+            self.err_output_path, self.stats["errors_queue"]
         )
-        return data_queue, output_path, counts
+        return output_path, counts
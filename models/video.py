@@ -1,8 +1,8 @@
 import os
-import isodate
 import logging
-from dataclasses import dataclass, \
-    field as _field, fields as _fields, asdict as _asdict
+from dataclasses import dataclass, fields as _fields
+
+from helpers import iso_to_seconds
 
 
 __all__ = (
@@ -15,20 +15,22 @@ logging.basicConfig(
 
 
 def asdict(video, name_prefix=None):
+    """ Shallow, public fields only, dict from video.
+    Faster than `dataclasses.asdict` which deep-copies every value. """
 
     if isinstance(video, dict):
         return video
 
-    return {f"{name_prefix or ''}{k}": v
-            for k, v in _asdict(video).items()
-            if not k.startswith('_')}  # and not k.startswith('video_id')}
+    prefix = name_prefix or ''
+    return {f"{prefix}{name}": getattr(video, name)
+            for name in video._PUBLIC_FIELDS}
 
 
 def fields(cls):
-    return [f.name for f in _fields(cls) if not f.name.startswith('_')]
+    return list(cls._PUBLIC_FIELDS)
 
 
-@dataclass
+@dataclass(slots=True)
 class Video:
     """
   Video resource from YouTube Data API v3 in JFP field naming.
@@ -60,20 +62,17 @@ class Video:
     subscribers_gained: str = ''
     subscribers_lost: str = ''
 
-    duration: str = ''
-    _duration: str = _field(init=False, repr=False)
+    duration: int | str = ''  # seconds, parsed from ISO 8601 in __post_init__
+
+    def __post_init__(self):
+        """ ISO 8601 date duration -> seconds, parsed once """
+        seconds = iso_to_seconds(str(self.duration))
+        if seconds is not None:
+            self.duration = seconds
 
     def __str__(self):
         return f"{self.video_id} {self.title} ({self.duration}s)"
 
-    @property
-    def duration(self):
-        return self._duration
-
-    @duration.setter
-    def duration(self, value):
-        """ ISO 8601 date duration -> seconds """
-        try:
-            self._duration = isodate.parse_duration(str(value)).seconds
-        except isodate.isoerror.ISO8601Error:
-            self._duration = value
+
+# public field names, computed once rather than on every asdict()/fields() call
+Video._PUBLIC_FIELDS = tuple(f.name for f in _fields(Video) if not f.name.startswith('_'))
@@ -5,9 +5,9 @@ import argparse
 import logging
 import pandas as pd
 
-from lib.videos import fetch_multiple_videos
+from lib.videos import fetch_multiple_videos, close_session
 from lib.scraper import scrape_multiple_videos
-from helpers import IO_TIMEOUT
+from helpers import IO_TIMEOUT, install_uvloop
 
 
 logging.basicConfig(
@@ -45,6 +45,7 @@ if __name__ == '__main__':
 
     # read arguments from command line
     args = parser.parse_args()
+    install_uvloop()
     csv_output_path = args.csv_output_path or f"{args.csv_input_path}-out.xlsx"
     include_fields = args.include_fields.split(",") if args.include_fields else None
 
@@ -70,7 +71,14 @@ if __name__ == '__main__':
     pipeline_kwargs = {"csv_output_path": f"{args.csv_input_path}-api-out.csv",
                        "fields": include_fields, "dry_run": args.dry_run,
                        "name": "Fetch videos using the YouTube Data API v3"}
-    fetched_videos = asyncio.run(fetch_multiple_videos(video_ids, **pipeline_kwargs))
+
+    async def fetch_videos():
+        try:
+            return await fetch_multiple_videos(video_ids, **pipeline_kwargs)
+        finally:
+            await close_session()
+
+    fetched_videos = asyncio.run(fetch_videos())
 
     # scrape videos asynchronously
     pipeline_kwargs = {"csv_output_path": f"{args.csv_input_path}-scraped-out.csv",